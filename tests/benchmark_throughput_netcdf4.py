@@ -1,4 +1,5 @@
-import os
+import queue
+import threading
 import time
 
 import numpy as np
@@ -8,26 +9,99 @@ from netCDF4 import Dataset
 file_path = "benchmark_netcdf4.nc"
 object_size = 128 * 1024  # bytes per "object"
 object_count = 1000
+block_rows = 64  # objects written per assignment, matches the chunk height
+# Per-variable HDF5 chunk cache, large enough to hold the working set of
+# chunks so none are evicted and rewritten mid-benchmark
+chunk_cache_size = 128 * 1024 * 1024
+chunk_cache_nelems = 1009  # prime, as HDF5 recommends for the hash table
+chunk_cache_preemption = 0.75
 
+# Storage variants: (payload generator, createVariable compression options).
+# "chunked" isolates the chunking overhead on incompressible data, "deflate"
+# measures the realistic I/O + compression pipeline on compressible data and
+# "quantized" additionally drops float precision beyond 3 decimal digits.
+variants = {
+    "chunked": ("random", dict(zlib=False, shuffle=False)),
+    "deflate": ("patterned", dict(zlib=True, complevel=1, shuffle=True)),
+    "quantized": (
+        "smooth",
+        dict(zlib=True, complevel=1, shuffle=True, least_significant_digit=3),
+    ),
+}
 
-def random_bytes(size):
-    return np.frombuffer(os.urandom(size), dtype=np.uint8)
 
+def random_bytes(rng, shape):
+    return rng.integers(0, 256, size=shape, dtype=np.uint8)
 
-def benchmark_write(file_path, size, count):
+
+def patterned_bytes(rng, shape):
+    return np.resize(np.arange(256, dtype=np.uint8), shape)
+
+
+def smooth_floats(rng, shape):
+    # Random walk, a stand-in for a continuous geophysical field
+    return np.cumsum(rng.standard_normal(shape, dtype=np.float32), axis=-1)
+
+
+# Payload name -> (generator, element dtype). Generators draw from a seeded
+# rng so the payload can be regenerated for verification after timing.
+payload_generators = {
+    "random": (random_bytes, np.dtype(np.uint8)),
+    "patterned": (patterned_bytes, np.dtype(np.uint8)),
+    "smooth": (smooth_floats, np.dtype(np.float32)),
+}
+
+
+def produce_blocks(blocks, make_data, seed, row_len, count):
+    # Fill the next block while the consumer writes the previous one. Errors
+    # are handed to the consumer, which would otherwise wait forever.
+    try:
+        rng = np.random.default_rng(seed)
+        for i in range(0, count, block_rows):
+            n = min(block_rows, count - i)
+            blocks.put(make_data(rng, (n, row_len)))
+    except BaseException as e:
+        blocks.put(e)
+
+
+def benchmark_write(file_path, size, count, payload="random", seed=None, **compression):
     print(
         f"Starting NetCDF4 write benchmark: {count} objects of {size // (1024 * 1024)}MB each"
     )
+    make_data, dtype = payload_generators[payload]
+    row_len = size // dtype.itemsize
+    blocks = queue.Queue(maxsize=2)
+    producer = threading.Thread(
+        target=produce_blocks,
+        args=(blocks, make_data, seed, row_len, count),
+        daemon=True,
+    )
     start = time.time()
+    producer.start()
     with Dataset(file_path, "w", format="NETCDF4") as ds:
         ds.createDimension("obj", count)
-        ds.createDimension("byte", size)
-        var = ds.createVariable("data", "u1", ("obj", "byte"))
-        for i in range(count):
-            data = random_bytes(size)
-            var[i, :] = data
-            if (i + 1) % 100 == 0:
-                print(f"  Wrote {i + 1}/{count} objects")
+        ds.createDimension("elem", row_len)
+        var = ds.createVariable(
+            "data",
+            dtype,
+            ("obj", "elem"),
+            chunksizes=(block_rows, row_len),
+            **compression,
+        )
+        var.set_var_chunk_cache(
+            size=chunk_cache_size,
+            nelems=chunk_cache_nelems,
+            preemption=chunk_cache_preemption,
+        )
+        for i in range(0, count, block_rows):
+            block = blocks.get()
+            if isinstance(block, BaseException):
+                raise RuntimeError("Payload producer failed") from block
+            n = block.shape[0]
+            var[i : i + n, :] = block
+            if (i + n) // 100 > i // 100:
+                print(f"  Wrote {i + n}/{count} objects")
+    producer.join()
     elapsed = time.time() - start
     mb_total = (size * count) / (1024 * 1024)
     print(f"Write benchmark finished in {elapsed:.2f} seconds")
@@ -44,11 +118,19 @@ def benchmark_read(file_path, size, count):
     start = time.time()
     with Dataset(file_path, "r") as ds:
         var = ds.variables["data"]
-        for i in range(count):
-            data = var[i, :]
-            assert data.shape[0] == size, f"Read size mismatch for object {i}"
-            if (i + 1) % 100 == 0:
-                print(f"  Read {i + 1}/{count} objects")
+        var.set_var_chunk_cache(
+            size=chunk_cache_size,
+            nelems=chunk_cache_nelems,
+            preemption=chunk_cache_preemption,
+        )
+        var.set_auto_maskandscale(False)
+        row_len = size // var.dtype.itemsize
+        assert var.shape == (count, row_len), f"Unexpected shape {var.shape}"
+        for i in range(0, count, block_rows):
+            data = var[i : i + block_rows, :]
+            n = data.shape[0]
+            if (i + n) // 100 > i // 100:
+                print(f"  Read {i + n}/{count} objects")
     elapsed = time.time() - start
     mb_total = (size * count) / (1024 * 1024)
     print(f"Read benchmark finished in {elapsed:.2f} seconds")
@@ -58,16 +140,51 @@ def benchmark_read(file_path, size, count):
     return elapsed
 
 
+def verify_payload(file_path, count, payload, seed, atol=None):
+    # Untimed pass: regenerate the written payload and compare block by block,
+    # exactly or, for lossy variants, within atol
+    make_data, _ = payload_generators[payload]
+    rng = np.random.default_rng(seed)
+    with Dataset(file_path, "r") as ds:
+        var = ds.variables["data"]
+        var.set_auto_maskandscale(False)
+        row_len = var.shape[1]
+        for i in range(0, count, block_rows):
+            n = min(block_rows, count - i)
+            expected = make_data(rng, (n, row_len))
+            data = var[i : i + n, :]
+            if atol is None:
+                matches = np.array_equal(data, expected)
+            else:
+                matches = np.allclose(data, expected, rtol=0, atol=atol)
+            assert matches, f"Payload mismatch in objects {i}-{i + n - 1}"
+
+
 def main():
-    write_time = benchmark_write(file_path, object_size, object_count)
-    read_time = benchmark_read(file_path, object_size, object_count)
+    results = {}
+    for name, (payload, compression) in variants.items():
+        print(f"\n[{name}]")
+        seed = np.random.SeedSequence().entropy
+        write_time = benchmark_write(
+            file_path, object_size, object_count, payload, seed, **compression
+        )
+        read_time = benchmark_read(file_path, object_size, object_count)
+        # Quantization keeps values within half a unit of the last retained
+        # decimal digit; other variants must round-trip exactly
+        atol = None
+        if "least_significant_digit" in compression:
+            atol = 0.5 * 10 ** -compression["least_significant_digit"]
+        verify_payload(file_path, object_count, payload, seed, atol)
+        results[name] = (write_time, read_time)
     print("\nBenchmark summary:")
-    print(
-        f"  Write: {object_count} objects x {object_size // (1024 * 1024)}MB in {write_time:.2f}s"
-    )
-    print(
-        f"  Read:  {object_count} objects x {object_size // (1024 * 1024)}MB in {read_time:.2f}s"
-    )
+    for name, (write_time, read_time) in results.items():
+        print(f"  [{name}]")
+        print(
+            f"  Write: {object_count} objects x {object_size // (1024 * 1024)}MB in {write_time:.2f}s"
+        )
+        print(
+            f"  Read:  {object_count} objects x {object_size // (1024 * 1024)}MB in {read_time:.2f}s"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,24 @@
+import pytest
+import zarr.storage
+
+import s3_settings
+
+
+@pytest.fixture(scope="session")
+def bucket_name():
+    return s3_settings.bucket_name
+
+
+@pytest.fixture(scope="session")
+def s3_client():
+    return s3_settings.make_s3_client()
+
+
+@pytest.fixture(scope="session")
+def s3_filesystem():
+    return s3_settings.make_s3_filesystem()
+
+
+@pytest.fixture(scope="session")
+def zarr_store(s3_filesystem, bucket_name):
+    return zarr.storage.FsspecStore(s3_filesystem, path=bucket_name)
@@ -1,56 +1,52 @@
+import hashlib
 import random
 import string
-from pathlib import Path
 
-import boto3
-from botocore.client import Config
+import pytest
 
-# Configuration
-endpoint_url = "http://localhost:9000"  # Change if your API runs elsewhere
-aws_access_key_id = "rustfsadmin"
-aws_secret_access_key = "rustfsadmin"
-bucket_name = "test"
 object_key = "log.txt"
-uploading_file = Path("uploading_file.txt")
-downloaded_file = Path("downloaded_file.txt")
-
-# Create random content and write to uploading_file.txt
-random_content = "".join(random.choices(string.ascii_letters + string.digits, k=1024))
-with open(uploading_file, "w") as f:
-    f.write(random_content)
-
-# Create S3 client
-s3 = boto3.client(
-    "s3",
-    endpoint_url=endpoint_url,
-    aws_access_key_id=aws_access_key_id,
-    aws_secret_access_key=aws_secret_access_key,
-    config=Config(signature_version="s3v4"),
-    region_name="us-east-1",
-)
-
-# List buckets
-print("Buckets:", s3.list_buckets())
-
-# Upload the file
-s3.upload_file(uploading_file, bucket_name, object_key)
-print(f"Uploaded {uploading_file} to {bucket_name}/{object_key}")
-
-# Download the file
-s3.download_file(bucket_name, object_key, downloaded_file)
-print(f"Downloaded {bucket_name}/{object_key} to {downloaded_file}")
-
-# Verify file integrity
-with open(uploading_file, "r") as f1, open(downloaded_file, "r") as f2:
-    uploaded_content = f1.read()
-    downloaded_content = f2.read()
-    assert uploaded_content == downloaded_content, (
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb", buffering=0) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def test_list_buckets(s3_client):
+    print("Buckets:", s3_client.list_buckets())
+
+
+def test_upload_download(s3_client, bucket_name, tmp_path):
+    uploading_file = tmp_path / "uploading_file.txt"
+    downloaded_file = tmp_path / "downloaded_file.txt"
+
+    # Create random content and write to uploading_file.txt
+    random_content = "".join(
+        random.choices(string.ascii_letters + string.digits, k=1024)
+    )
+    with open(uploading_file, "w") as f:
+        f.write(random_content)
+
+    # Upload the file
+    s3_client.upload_file(uploading_file, bucket_name, object_key)
+    print(f"Uploaded {uploading_file} to {bucket_name}/{object_key}")
+
+    # Download the file
+    s3_client.download_file(bucket_name, object_key, downloaded_file)
+    print(f"Downloaded {bucket_name}/{object_key} to {downloaded_file}")
+
+    # Verify file integrity
+    assert file_digest(uploading_file) == file_digest(downloaded_file), (
         "Downloaded file content does not match uploaded file!"
     )
-print("File integrity verified: downloaded content matches uploaded content.")
-uploading_file.unlink()
-downloaded_file.unlink()
+    print("File integrity verified: downloaded content matches uploaded content.")
+
+    # List objects in the bucket
+    print("Objects:", s3_client.list_objects_v2(Bucket=bucket_name))
 
 
-# List objects in the bucket
-print("Objects:", s3.list_objects_v2(Bucket=bucket_name))
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-s"]))
@@ -0,0 +1,47 @@
+import tomllib
+from pathlib import Path
+
+import boto3
+import s3fs
+from botocore.client import Config
+
+# Connection settings shared by the Python tests and benchmarks. The endpoint
+# and bucket come from tests/config.toml, like the Rust tests' read_config().
+with open(Path(__file__).with_name("config.toml"), "rb") as f:
+    _config = tomllib.load(f)
+
+endpoint_url = f"http://{_config['bind_address']}:{_config['port']}"
+bucket_name = _config["buckets"][0]
+aws_access_key_id = "minioadmin"
+aws_secret_access_key = "minioadmin"
+region_name = "us-east-1"
+
+
+def make_s3_client(**config_options):
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=Config(signature_version="s3v4", **config_options),
+        region_name=region_name,
+    )
+
+
+def make_s3_filesystem():
+    return s3fs.S3FileSystem(
+        endpoint_url=endpoint_url,
+        key=aws_access_key_id,
+        secret=aws_secret_access_key,
+        use_ssl=True,
+        asynchronous=True,
+        # No read-ahead: chunk reads are whole-object and non-sequential
+        default_cache_type="none",
+        # Up to 64 pooled connections; idle ones stay open for 60 s (aiobotocore
+        # default 12 s) so gaps between benchmark phases don't force new
+        # handshakes. Sharing needs callers to reuse this filesystem instance.
+        config_kwargs={
+            "max_pool_connections": 64,
+            "connector_args": {"keepalive_timeout": 60},
+        },
+    )
@@ -1,56 +1,94 @@
+import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import cast
 
 import numpy as np
-import s3fs
 import zarr
 import zarr.storage
+from zarr.core.sync import sync
 
-base_url = "http://127.0.0.1:9000"
+from s3_settings import bucket_name, make_s3_filesystem
 
-fs = s3fs.S3FileSystem(
-    endpoint_url=base_url,
-    key="minioadmin",
-    secret="minioadmin",
-    use_ssl=True,
-    asynchronous=True,
-)
-store = zarr.storage.FsspecStore(fs, path="test")
 top_groups = 100
 sub_groups = 10
 arrays_per_subgroup = 200
 array_shape = (100, 4)
 array_dtype = "f4"
+# Half-precision variant: half the bytes per chunk for the same PUT count
+array_dtype_variant = "f2"
+array_dtypes = [array_dtype, array_dtype_variant]
+max_workers = 64  # concurrent PUTs while uploading the hierarchy
+group_names = [f"group_{i:03d}" for i in range(top_groups)]
+subgroup_names = [f"subgroup_{j:03d}" for j in range(sub_groups)]
+array_names = [f"array_{k:03d}" for k in range(arrays_per_subgroup)]
+prefetch_window = 16  # arrays kept in flight while reading a subgroup
+async_concurrency = 32  # concurrent chunk requests per zarr operation
+consolidate_workers = 8  # subgroups consolidated concurrently
 
 
-def create_large_hierarchy():
+def store_path(dtype):
+    # Each dtype variant gets its own hierarchy so they can be compared
+    return f"{bucket_name}/{dtype}"
+
+
+def encode_template(dtype):
+    # Let zarr encode one group and one filled array in memory; returns the
+    # group zarr.json and the array's keys (relative to the array) as bytes
+    template = {}
+    mem = zarr.storage.MemoryStore(template)
+    zarr.group(mem)
+    arr = zarr.create_array(mem, name="array", shape=array_shape, dtype=dtype)
+    arr[:] = np.random.rand(*array_shape).astype(dtype)
+    group_meta = template["zarr.json"].to_bytes()
+    array_files = {
+        key.removeprefix("array/"): buf.to_bytes()
+        for key, buf in template.items()
+        if key.startswith("array/")
+    }
+    return group_meta, array_files
+
+
+def create_large_hierarchy(store, dtype=array_dtype):
     print("Creating large Zarr hierarchy...")
     t0 = time.time()
-    root = zarr.group(store)
-    for i in range(top_groups):
-        g_name = f"group_{i:03d}"
-        g = root.require_group(g_name)
-        for j in range(sub_groups):
-            sg_name = f"subgroup_{j:03d}"
-            sg = g.require_group(sg_name)
-            for k in range(arrays_per_subgroup):
-                arr_name = f"array_{k:03d}"
-                arr = sg.create_array(
-                    arr_name,
-                    shape=array_shape,
-                    dtype=array_dtype,
-                    overwrite=True,
-                )
-                arr[:] = np.random.rand(*array_shape).astype(array_dtype)
+    # Every array has the same metadata and payload, so encode them once and
+    # upload the raw keys in bulk instead of going through create_array
+    group_meta, array_files = encode_template(dtype)
+    sync(store.fs._pipe({f"{store.path}/zarr.json": group_meta}))
+    for i, g_name in enumerate(group_names):
+        g_path = f"{store.path}/{g_name}"
+        batch = {f"{g_path}/zarr.json": group_meta}
+        for sg_name in subgroup_names:
+            sg_path = f"{g_path}/{sg_name}"
+            batch[f"{sg_path}/zarr.json"] = group_meta
+            for arr_name in array_names:
+                for key, data in array_files.items():
+                    batch[f"{sg_path}/{arr_name}/{key}"] = data
+        # One batch per top-level group bounds the number of queued uploads
+        sync(store.fs._pipe(batch, batch_size=max_workers))
         if (i + 1) % 10 == 0:
             print(f"Created {i + 1} top-level groups...")
     t1 = time.time()
     print(f"Hierarchy creation (upload) took {t1 - t0:.2f} seconds.")
+    # Consolidate each subgroup's array metadata (~190 KB) into its zarr.json
+    # so listing it is one fetch. A single root document would be ~177 MiB,
+    # far beyond what s3insqlite accepts in one PUT.
+    subgroup_paths = [f"{g}/{sg}" for g in group_names for sg in subgroup_names]
+    with ThreadPoolExecutor(max_workers=consolidate_workers) as ex:
+        for _ in ex.map(
+            lambda path: zarr.consolidate_metadata(store, path=path), subgroup_paths
+        ):
+            pass
+    t2 = time.time()
+    print(f"Metadata consolidation took {t2 - t1:.2f} seconds.")
 
 
-def list_performance():
+def list_performance(store):
     print("Listing all arrays...")
     t0 = time.time()
+    # Subgroups with consolidated metadata list their arrays from it; others
+    # (e.g. hierarchies created before consolidation) fall back to a LIST
     root = zarr.open_group(store)
     count = 0
     for g_name in root.group_keys():
@@ -64,7 +102,25 @@ def list_performance():
     print(f"Listed {count} arrays in {t1 - t0:.2f} seconds.")
 
 
-def download_performance():
+def list_performance_flat(store):
+    print("Listing all arrays from a flat key scan...")
+    t0 = time.time()
+    # One paginated ListObjectsV2 stream over the whole prefix, run on zarr's
+    # event loop since the async filesystem's session is bound to it
+    keys = sync(store.fs._find(store.path))
+    hierarchy = {}
+    for key in keys:
+        parts = key[len(store.path) + 1 :].split("/")
+        # <group>/<subgroup>/<array>/zarr.json
+        if len(parts) == 4 and parts[-1] == "zarr.json":
+            g_name, sg_name, arr_name, _ = parts
+            hierarchy.setdefault(g_name, {}).setdefault(sg_name, []).append(arr_name)
+    count = sum(len(arrs) for sgs in hierarchy.values() for arrs in sgs.values())
+    t1 = time.time()
+    print(f"Listed {count} arrays in {t1 - t0:.2f} seconds.")
+
+
+def download_performance(store):
     print("Downloading a sample array...")
     root = zarr.open_group(store)
     g = cast(zarr.Group, root["group_000"])
@@ -75,8 +131,42 @@ def download_performance():
     t1 = time.time()
     print(f"Downloaded array shape {arr.shape} in {t1 - t0:.4f} seconds.")
 
+    print("Downloading all arrays of a subgroup...")
+    t0 = time.time()
+    names = list(sg.array_keys())
+    # Up to prefetch_window reads are in flight while earlier results are
+    # consumed, overlapping the GET round trips
+    with ThreadPoolExecutor(max_workers=prefetch_window) as ex:
+        for _data in ex.map(lambda name: cast(zarr.Array, sg[name])[:], names):
+            pass
+    t1 = time.time()
+    print(f"Downloaded {len(names)} arrays in {t1 - t0:.4f} seconds.")
+
 
 if __name__ == "__main__":
-    # create_large_hierarchy()
-    list_performance()
-    download_performance()
+    parser = argparse.ArgumentParser(description="Zarr many-key benchmark")
+    parser.add_argument(
+        "--dtype",
+        nargs="+",
+        choices=array_dtypes,
+        default=[array_dtype],
+        help="payload dtype variant(s) to benchmark",
+    )
+    parser.add_argument(
+        "--create", action="store_true", help="upload the hierarchy first"
+    )
+    args = parser.parse_args()
+
+    # All variant stores share one filesystem and its connection pool
+    fs = make_s3_filesystem()
+    # Let zarr fetch the chunks of a multi-chunk array concurrently; scoped to
+    # the benchmark run so importing this module leaves zarr's config alone
+    with zarr.config.set({"async.concurrency": async_concurrency, "async.timeout": 30}):
+        for dtype in args.dtype:
+            print(f"\n[{dtype}]")
+            store = zarr.storage.FsspecStore(fs, path=store_path(dtype))
+            if args.create:
+                create_large_hierarchy(store, dtype=dtype)
+            list_performance(store)
+            list_performance_flat(store)
+            download_performance(store)